@@ -1,8 +1,80 @@
+import collections
+import concurrent.futures
 import hashlib
-import json
+import itertools
+import multiprocessing
+import struct
 import time
 import random
 
+import orjson
+
+from utils import generate_certificate
+
+# Nonces a mining worker claims from the shared counter at a time
+NONCE_BATCH_SIZE = 1024
+
+# Binary layouts for the hashed block header
+_HEADER_START = struct.Struct(">Qd")  # index, timestamp
+_LENGTH = struct.Struct(">I")
+_NONCE = struct.Struct(">Q")
+
+def _pack_str(value):
+    """Pack a string as a length-prefixed UTF-8 field."""
+    data = value.encode()
+    return _LENGTH.pack(len(data)) + data
+
+def _pack_certificates(certificates):
+    """
+    Pack task certificates as a length-prefixed, sorted-key JSON field.
+    
+    Raises:
+        ValueError: If a certificate cannot be serialized (e.g. an int wider than 64 bits)
+    """
+    try:
+        data = orjson.dumps(certificates, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError as e:
+        raise ValueError(f"Task certificate cannot be serialized: {e}") from e
+    return _LENGTH.pack(len(data)) + data
+
+# Transaction Class: Represents a token transfer between two addresses
+class Transaction:
+    __slots__ = ("sender", "recipient", "amount")
+
+    def __init__(self, sender, recipient, amount):
+        """
+        Initialize a new transaction.
+        
+        Args:
+            sender (str): Sender's address
+            recipient (str): Recipient's address
+            amount (int or float): Amount to transfer
+        
+        Raises:
+            ValueError: If an address is not a string or the amount is not a number
+        """
+        for address in (sender, recipient):
+            if not isinstance(address, str):
+                raise ValueError(f"Transaction address must be a string, got {type(address).__name__}")
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+            raise ValueError(f"Transaction amount must be a number, got {type(amount).__name__}")
+        self.sender = sender
+        self.recipient = recipient
+        self.amount = amount
+
+    def pack(self):
+        """
+        Pack the transaction into its binary form for block hashing.
+        
+        Returns:
+            bytes: sender || recipient || amount
+        """
+        # repr keeps ints of any size and floats exact, and tells 5 from 5.0
+        return _pack_str(self.sender) + _pack_str(self.recipient) + _pack_str(repr(self.amount))
+
+    def __repr__(self):
+        return f"Transaction({self.sender!r}, {self.recipient!r}, {self.amount!r})"
+
 # Block Class: Represents a single block in the Virtus WorkChain blockchain
 class Block:
     def __init__(self, index, transactions, task_certificates, previous_hash):
@@ -11,7 +83,7 @@ class Block:
         
         Args:
             index (int): Block height in the chain
-            transactions (list): List of transactions in the block
+            transactions (list): List of Transaction objects in the block
             task_certificates (list): List of task completion certificates
             previous_hash (str): Hash of the previous block
         """
@@ -30,15 +102,115 @@ class Block:
         Returns:
             str: Hexadecimal hash of the block
         """
-        block_string = json.dumps({
-            "index": self.index,
-            "timestamp": self.timestamp,
-            "transactions": self.transactions,
-            "task_certificates": self.task_certificates,
-            "previous_hash": self.previous_hash,
-            "nonce": self.nonce
-        }, sort_keys=True).encode()
-        return hashlib.sha256(block_string).hexdigest()
+        return hashlib.sha256(self.pack_header() + _NONCE.pack(self.nonce)).hexdigest()
+
+    def pack_header(self):
+        """
+        Pack every hashed field except the nonce into a canonical byte string.
+        
+        Layout: index || timestamp || len(txs) || tx* || len(certs) || certs
+        || previous_hash, with fixed-width big-endian numbers, length-prefixed
+        strings, and the certificates as sorted-key JSON. The hashed message
+        is this header followed by the 8-byte nonce, so mining can hash the
+        header once and reuse that SHA-256 state for every nonce.
+        
+        Returns:
+            bytes: Block header without the nonce
+        """
+        parts = [_HEADER_START.pack(self.index, self.timestamp), _LENGTH.pack(len(self.transactions))]
+        parts.extend(tx.pack() for tx in self.transactions)
+        parts += [_pack_certificates(self.task_certificates), _pack_str(self.previous_hash)]
+        return b"".join(parts)
+
+    def mine(self, difficulty, workers=1):
+        """
+        Search for a nonce whose block hash satisfies the difficulty.
+        
+        Args:
+            difficulty (int): Number of leading zero hex digits required
+            workers (int): Number of processes to split the nonce space across
+        
+        Returns:
+            tuple: (nonce, hash) of the successful attempt
+        """
+        if workers > 1:
+            self.nonce, self.hash = _mine_parallel(self, difficulty, workers)
+            return self.nonce, self.hash
+
+        header = hashlib.sha256(self.pack_header())
+        nonce, digest = _scan_nonces(header, itertools.count(self.nonce), difficulty)
+        self.nonce, self.hash = nonce, digest.hex()
+        return self.nonce, self.hash
+
+def _scan_nonces(header, nonces, difficulty):
+    """
+    Test each nonce against the difficulty.
+    
+    Args:
+        header (hashlib._Hash): SHA-256 state after hashing the block header
+        nonces (iterable): Nonces to try, in order
+        difficulty (int): Number of leading zero hex digits required
+    
+    Returns:
+        tuple: (nonce, digest) of the first hit, None if no nonce qualifies
+    """
+    # Check raw digest bytes: whole zero bytes, plus a zero high nibble for odd difficulty
+    zero_bytes, odd_nibble = divmod(difficulty, 2)
+    zero_prefix = b"\x00" * zero_bytes
+    for nonce in nonces:
+        attempt = header.copy()
+        attempt.update(_NONCE.pack(nonce))
+        digest = attempt.digest()
+        if digest.startswith(zero_prefix) and (not odd_nibble or digest[zero_bytes] < 0x10):
+            return nonce, digest
+    return None
+
+# Mining Workers: Share the nonce search across processes
+_found = None
+_next_nonce = None
+
+def _init_miner(found, next_nonce):
+    """Store the shared "found" flag and nonce counter in a mining worker process."""
+    global _found, _next_nonce
+    _found = found
+    _next_nonce = next_nonce
+
+def _search_nonces(block, difficulty):
+    """
+    Claim batches of nonces from the shared counter and test them until one
+    satisfies the difficulty or another worker reports success.
+    
+    Returns:
+        tuple: (nonce, hash) if found by this worker, None otherwise
+    """
+    header = hashlib.sha256(block.pack_header())
+    while not _found.is_set():
+        with _next_nonce.get_lock():
+            start = _next_nonce.value
+            _next_nonce.value += NONCE_BATCH_SIZE
+        result = _scan_nonces(header, range(start, start + NONCE_BATCH_SIZE), difficulty)
+        if result is not None:
+            _found.set()
+            nonce, digest = result
+            return nonce, digest.hex()
+    return None
+
+def _mine_parallel(block, difficulty, workers):
+    """
+    Mine a block with worker processes sharing one nonce counter.
+    
+    Returns:
+        tuple: (nonce, hash) of the first successful attempt
+    """
+    found = multiprocessing.Event()
+    next_nonce = multiprocessing.Value("Q", block.nonce)
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_miner,
+                                                initargs=(found, next_nonce)) as executor:
+        futures = [executor.submit(_search_nonces, block, difficulty) for _ in range(workers)]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            if result is not None:
+                return result
 
 # VirtusWorkChain Class: Manages the blockchain and its operations
 class VirtusWorkChain:
@@ -49,9 +221,11 @@ class VirtusWorkChain:
         self.chain = [self.create_genesis_block()]
         self.difficulty = 4  # Number of leading zeros required in hash for PoW
         self.pending_transactions = []
-        self.pending_task_certificates = []
+        self.pending_task_certificates = collections.deque()
         self.min_task_certificates_per_block = 5  # Minimum certificates required to mine
         self.mining_reward = 5  # Reward for mining a block
+        self.mining_workers = 1  # Processes used for the nonce search
+        self._balances = collections.defaultdict(int)  # Balance per address over the mined chain
 
     def create_genesis_block(self):
         """
@@ -79,36 +253,34 @@ class VirtusWorkChain:
             miner_address (str): Address of the miner to receive the reward
         
         Raises:
-            ValueError: If there are insufficient task certificates
+            ValueError: If there are insufficient task certificates or the
+                miner address is not a string
         """
-        # Add miner reward transaction
-        reward_tx = {"from": "network", "to": miner_address, "amount": self.mining_reward}
-        self.pending_transactions.append(reward_tx)
-
         # Check for sufficient task certificates
         if len(self.pending_task_certificates) < self.min_task_certificates_per_block:
             raise ValueError(f"Need at least {self.min_task_certificates_per_block} task certificates to mine")
-        
-        # Take the required number of task certificates
-        task_certificates = self.pending_task_certificates[:self.min_task_certificates_per_block]
-        self.pending_task_certificates = self.pending_task_certificates[self.min_task_certificates_per_block:]
 
-        # Create a new block
-        block = Block(len(self.chain), self.pending_transactions, task_certificates, self.get_latest_block().hash)
+        # Create a new block with the miner reward transaction. Pending state is
+        # only consumed once the block is mined and on the chain.
+        reward_tx = Transaction("network", miner_address, self.mining_reward)
+        task_certificates = list(itertools.islice(self.pending_task_certificates,
+                                                  self.min_task_certificates_per_block))
+        block = Block(len(self.chain), self.pending_transactions + [reward_tx], task_certificates,
+                      self.get_latest_block().hash)
 
         # Proof-of-Work: Find a nonce that satisfies the difficulty
         print(f"Mining block #{block.index}...")
         start_time = time.time()
-        while block.hash[:self.difficulty] != "0" * self.difficulty:
-            block.nonce += 1
-            block.hash = block.calculate_hash()
-        
+        block.mine(self.difficulty, self.mining_workers)
         end_time = time.time()
         print(f"Block mined! Hash: {block.hash} (Time: {end_time - start_time:.2f}s)")
         
-        # Add block to chain and clear pending transactions
+        # Add block to chain and clear the pending transactions and certificates it took
         self.chain.append(block)
+        self._apply_transactions(block.transactions)
         self.pending_transactions = []
+        for _ in range(self.min_task_certificates_per_block):
+            self.pending_task_certificates.popleft()
 
     def add_transaction(self, sender, recipient, amount):
         """
@@ -117,9 +289,12 @@ class VirtusWorkChain:
         Args:
             sender (str): Sender's address
             recipient (str): Recipient's address
-            amount (int): Amount to transfer
+            amount (int or float): Amount to transfer
+        
+        Raises:
+            ValueError: If an address is not a string or the amount is not a number
         """
-        transaction = {"from": sender, "to": recipient, "amount": amount}
+        transaction = Transaction(sender, recipient, amount)
         self.pending_transactions.append(transaction)
         print(f"Transaction added: {sender} -> {recipient} ({amount} tokens)")
 
@@ -129,7 +304,11 @@ class VirtusWorkChain:
         
         Args:
             certificate (dict): Task certificate data
+        
+        Raises:
+            ValueError: If the certificate cannot be serialized into a block
         """
+        _pack_certificates([certificate])
         self.pending_task_certificates.append(certificate)
         print(f"Task certificate added: Task ID {certificate['task_id']}")
 
@@ -137,6 +316,19 @@ class VirtusWorkChain:
         """
         Validate the integrity of the blockchain.
         
+        Returns:
+            bool: True if valid, False otherwise
+        """
+        if not self._validate_blocks():
+            # The chain was altered outside mine_block, so the balance index may be stale
+            self._recompute_balances()
+            return False
+        return True
+
+    def _validate_blocks(self):
+        """
+        Check every block's hash, linkage and task certificates.
+        
         Returns:
             bool: True if valid, False otherwise
         """
@@ -171,14 +363,26 @@ class VirtusWorkChain:
         Returns:
             int: Total balance
         """
-        balance = 0
+        return self._balances.get(address, 0)
+
+    def _apply_transactions(self, transactions):
+        """
+        Apply a mined block's transactions to the balance index.
+        
+        Args:
+            transactions (list): Transactions from the mined block
+        """
+        for tx in transactions:
+            self._balances[tx.sender] -= tx.amount
+            self._balances[tx.recipient] += tx.amount
+
+    def _recompute_balances(self):
+        """
+        Rebuild the balance index by scanning the whole chain.
+        """
+        self._balances.clear()
         for block in self.chain:
-            for tx in block.transactions:
-                if tx["from"] == address:
-                    balance -= tx["amount"]
-                if tx["to"] == address:
-                    balance += tx["amount"]
-        return balance
+            self._apply_transactions(block.transactions)
 
 # Task Functions: Handle task completion and certificate generation
 def generate_task_certificate(task_id, user_address, task_data):
@@ -194,13 +398,7 @@ def generate_task_certificate(task_id, user_address, task_data):
         dict: Task certificate if valid, None otherwise
     """
     if validate_task(task_data):
-        certificate = {
-            "task_id": task_id,
-            "user_address": user_address,
-            "timestamp": time.time(),
-            "signature": hashlib.sha256(f"{task_id}{user_address}{time.time()}".encode()).hexdigest()
-        }
-        return certificate
+        return generate_certificate(task_id, user_address)
     return None
 
 def validate_task(task_data):
@@ -214,7 +412,7 @@ def validate_task(task_data):
         bool: True if valid, False otherwise
     """
     # Simulate task validation (e.g., checking accuracy or completeness)
-    return random.choice([True, True, False])  # 66% chance of success for demo
+    return random.random() < 2 / 3  # 66% chance of success for demo
 
 # Main Execution: Demonstrate the blockchain in action
 if __name__ == "__main__":
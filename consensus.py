@@ -6,6 +6,11 @@ class ProofOfStake:
     def __init__(self):
         self.stakers = {}  # {public_key: stake_amount}
         self.min_stake = 10  # Minimum tokens to stake
+        # Walker alias table for O(1) validator selection, rebuilt lazily after stake changes
+        self._keys = []
+        self._prob = []
+        self._alias = []
+        self._alias_dirty = True
 
     def add_staker(self, public_key, amount):
         """Add or update a staker's token stake."""
@@ -15,6 +20,7 @@ class ProofOfStake:
             self.stakers[public_key] += amount
         else:
             self.stakers[public_key] = amount
+        self._alias_dirty = True
         print(f"Staker {public_key[:8]}... staked {amount} tokens")
 
     def remove_staker(self, public_key, amount):
@@ -24,20 +30,37 @@ class ProofOfStake:
         self.stakers[public_key] -= amount
         if self.stakers[public_key] == 0:
             del self.stakers[public_key]
+        self._alias_dirty = True
         print(f"Staker {public_key[:8]}... unstaked {amount} tokens")
 
     def select_validator(self):
         """Select a validator based on stake weight."""
         if not self.stakers:
             raise ValueError("No stakers available")
+        if self._alias_dirty:
+            self._build_alias_table()
+        i = random.randrange(len(self._keys))
+        if random.random() < self._prob[i]:
+            return self._keys[i]
+        return self._keys[self._alias[i]]
+
+    def _build_alias_table(self):
+        """Rebuild the alias table from the current stakes (Vose's method)."""
+        self._keys = list(self.stakers)
+        n = len(self._keys)
         total_stake = sum(self.stakers.values())
-        selection = random.uniform(0, total_stake)
-        current = 0
-        for public_key, stake in self.stakers.items():
-            current += stake
-            if current >= selection:
-                return public_key
-        return list(self.stakers.keys())[-1]  # Fallback
+        scaled = [self.stakers[key] * n / total_stake for key in self._keys]
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+        self._alias_dirty = False
 
     def calculate_reward(self, validator):
         """Calculate staking reward for the validator."""
@@ -11,3 +11,8 @@ def complete_task(task_id, user_address, task_data):
     if validate_task(task_data):
         return generate_certificate(task_id, user_address)
     return None
+
+def complete_task_batch(task_ids, user_addresses, task_datas):
+    """Complete a batch of tasks, returning a certificate (or None) per task."""
+    return [complete_task(task_id, user_address, task_data)
+            for task_id, user_address, task_data in zip(task_ids, user_addresses, task_datas)]
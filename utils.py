@@ -1,14 +1,30 @@
 import hashlib
-import json
+import time
+
+import orjson
 
 def sha256_hash(data):
-    """Compute SHA-256 hash of the input data."""
-    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    """
+    Compute SHA-256 hash of the input data.
+
+    data may hold dicts (with str, int, float or bool keys), lists, tuples,
+    str, bool, None, ints within 64 bits and finite floats. NaN and infinity
+    serialize as null, so they hash the same as None.
+
+    Raises:
+        ValueError: If data contains a value outside that domain
+    """
+    try:
+        data_bytes = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError as e:
+        raise ValueError(f"Data cannot be serialized for hashing: {e}") from e
+    return hashlib.sha256(data_bytes).hexdigest()
 
 def generate_certificate(task_id, user_address):
     """Generate a simple certificate for task completion."""
-    timestamp = time.time()
-    signature = hashlib.sha256(f"{task_id}{user_address}{timestamp}".encode()).hexdigest()
+    timestamp = time.time_ns()
+    payload = str(task_id).encode() + str(user_address).encode() + b"%d" % timestamp
+    signature = hashlib.sha256(payload).hexdigest()
     return {
         "task_id": task_id,
         "user_address": user_address,